@@ -0,0 +1,57 @@
+import argparse
+import logging
+from datetime import datetime
+
+from utils.batch_runner import BatchRunner
+from utils.charts import CHART_BACKENDS
+from utils.scoring_rules import DEFAULT_SCORING_RULES_PATH
+
+logger = logging.getLogger("analyzer")
+
+
+def __main__():
+    formatter = logging.Formatter(fmt="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
+    handler = logging.StreamHandler()
+    handler.setFormatter(formatter)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    parser = argparse.ArgumentParser(description="Analyze a large list of clans in parallel, resuming past runs")
+    parser.add_argument("clan_file", help="file with one clan per line: tag[,alias[,name]]")
+    parser.add_argument("--month", default=datetime.now().strftime("%b").upper())
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--key-rate", type=float, default=None, help="requests per second allowed per api key")
+    parser.add_argument("--recheck", action="store_true", help="refetch league data from the api")
+    parser.add_argument("--force", action="store_true", help="rebuild artifacts even if inputs are unchanged")
+    parser.add_argument(
+        "--war-history", action="store_true", help="also ingest the regular war logs into war_history.npz"
+    )
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and run every clan again")
+    parser.add_argument("--chart-backend", default="matplotlib", choices=list(CHART_BACKENDS))
+    parser.add_argument("--scoring-rules", default=DEFAULT_SCORING_RULES_PATH, help="json file with the scoring rules")
+    parser.add_argument("--no-images", action="store_true", help="skip the per clan overview images")
+    args = parser.parse_args()
+
+    runner = BatchRunner(
+        args.month.upper(),
+        args.workers,
+        args.key_rate,
+        recheck=args.recheck,
+        force=args.force,
+        images=not args.no_images,
+        restart=args.restart,
+        scoring_rules=args.scoring_rules,
+        chart_backend=args.chart_backend,
+    )
+    clans = runner.load_clans(args.clan_file)
+    outcomes = runner.run(clans)
+    done = sum(1 for outcome in outcomes if outcome.status == "done")
+    logger.info(f"Batch finished, {done}/{len(outcomes)} clans done")
+
+    if args.war_history:
+        runner.ingest_war_history(clans)
+        logger.info(f"War history of {len(clans)} clans ingested")
+
+
+if __name__ == "__main__":
+    __main__()
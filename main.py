@@ -3,9 +3,13 @@ import logging
 import os
 from datetime import datetime
 
+from utils.artifacts import ArtifactCache
 from utils.cwl_analyzer import CwlAnalyzer
+from utils.family_leaderboard import FamilyLeaderboard
 from utils.overview_generator import OverviewGenerator
 from utils.results_generator import ResultsGenerator
+from utils.season_export import export_season
+from utils.war_history import WarHistoryIngestor, export_war_history
 
 logger = logging.getLogger("analyzer")
 
@@ -31,6 +35,11 @@ def __main__():
         "ls": "#GCCUC2YR",
     }
     recheck = False
+    scout = False
+    export = False
+    force_rebuild = False
+    war_history = False
+    chart_backend = "matplotlib"  # or "pil", faster and without the matplotlib dependency
     name_map = {
         "bc": "The Black Cabin",
         "tbc": "TBC",
@@ -43,14 +52,45 @@ def __main__():
     }
 
     all_clans = {}
+    results = []
+    artifacts = ArtifactCache(month, force=force_rebuild)
+    leaderboard = FamilyLeaderboard()
     for clan, tag in clan_map.items():
-        analyzer = CwlAnalyzer(recheck=recheck)
+        analyzer = CwlAnalyzer(recheck=recheck, scout=scout, chart_backend=chart_backend, artifacts=artifacts)
         analyzer.analyze(tag, clan, name_map[clan], month)
-        ResultsGenerator(month, clan, tag, name_map[clan], analyzer).generate()
+        ResultsGenerator(month, clan, tag, name_map[clan], analyzer, artifacts=artifacts).generate()
+        leaderboard.add_clan(analyzer.result, analyzer.league.clan_league)
+        if export:
+            results.append(analyzer.result)
 
-        all_clans[clan] = analyzer
+        # only the summary is kept, the league with its raw war data is released here
+        summary = analyzer.summary()
+        summary.save(month)
+        all_clans[clan] = summary
+        del analyzer
 
-    OverviewGenerator(month, all_clans).generate()
+    OverviewGenerator(month, all_clans, artifacts=artifacts).generate()
+
+    leaderboard_path = f"results/{month}/family_leaderboard.csv"
+    leaderboard_fingerprint = ArtifactCache.fingerprint(
+        [(clan, summary.analysis_fingerprint, summary.league_name) for clan, summary in all_clans.items()]
+    )
+    if not artifacts.is_fresh("family_leaderboard", leaderboard_fingerprint, [leaderboard_path]):
+        leaderboard.save_csv(leaderboard_path)
+        artifacts.record("family_leaderboard", leaderboard_fingerprint, [leaderboard_path])
+
+    if export:
+        export_season(results, f"results/{month}/season.npz")
+
+    if war_history:
+        # regular wars are scored with the cwl rules and exported in the same format as the season
+        histories = WarHistoryIngestor().ingest(list(clan_map.values()))
+        export_war_history(
+            histories,
+            [(clan, tag, name_map[clan]) for clan, tag in clan_map.items()],
+            month,
+            f"results/{month}/war_history.npz",
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+
+logger = logging.getLogger("analyzer")
+
+# bump when rendering or output formats change so every artifact is rebuilt
+RENDERER_VERSION = "1"
+
+
+class ArtifactCache:
+    __file_digests: dict[tuple, str] = {}
+
+    def __init__(self, month: str, force: bool = False, name: str = "artifacts") -> None:
+        self.force = force
+        self.manifest_path = f"results/{month}/{name}.json"
+        self.manifest: dict[str, dict] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.loads(f.read())
+
+    @staticmethod
+    def fingerprint(*inputs: Any) -> str:
+        encoded = json.dumps([RENDERER_VERSION, *inputs], sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @classmethod
+    def file_digest(cls, path: str) -> str:
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in cls.__file_digests:
+            with open(path, "rb") as f:
+                cls.__file_digests[key] = hashlib.sha256(f.read()).hexdigest()
+
+        return cls.__file_digests[key]
+
+    def is_fresh(self, stage: str, fingerprint: str, outputs: list[str]) -> bool:
+        if self.force:
+            return False
+
+        entry = self.manifest.get(stage)
+        fresh = (
+            entry is not None
+            and entry["fingerprint"] == fingerprint
+            and entry["outputs"] == outputs
+            and all(os.path.exists(output) for output in outputs)
+        )
+        if fresh:
+            logger.info(f"Skipping {stage}, inputs unchanged")
+
+        return fresh
+
+    def record(self, stage: str, fingerprint: str, outputs: list[str]) -> None:
+        self.manifest[stage] = {"fingerprint": fingerprint, "outputs": outputs}
+
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.manifest, f, indent=4, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
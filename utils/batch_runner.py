@@ -0,0 +1,191 @@
+import csv
+import json
+import logging
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from utils.artifacts import ArtifactCache
+from utils.coc_api_service import CocApiService
+from utils.cwl_analyzer import CwlAnalyzer
+from utils.results_generator import ResultsGenerator
+from utils.scoring_rules import DEFAULT_SCORING_RULES_PATH
+from utils.war_history import WarHistoryIngestor, export_war_history
+
+logger = logging.getLogger("analyzer")
+
+
+@dataclass
+class BatchClan:
+    alias: str
+    tag: str
+    name: Optional[str] = None
+
+
+@dataclass
+class BatchOutcome:
+    alias: str
+    tag: str
+    status: str
+    error: Optional[str] = None
+    traceback: Optional[str] = None
+    # flags the clan was run with, a clan done with different flags is run again
+    parameters: Optional[dict] = None
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        month: str,
+        workers: int = 4,
+        key_rate: Optional[float] = None,
+        *,
+        recheck: bool = False,
+        force: bool = False,
+        images: bool = True,
+        restart: bool = False,
+        scoring_rules: str = DEFAULT_SCORING_RULES_PATH,
+        chart_backend: str = "matplotlib",
+    ) -> None:
+        self.month = month
+        self.workers = workers
+        # every worker has its own pool over all keys, so each gets a share of the per key rate
+        self.key_rate = key_rate or float(os.getenv("COC_API_RATE", "10"))
+        self.recheck = recheck
+        self.force = force
+        self.images = images
+        self.restart = restart
+        self.scoring_rules = scoring_rules
+        self.chart_backend = chart_backend
+        self.checkpoint_path = f"results/{month}/batch_checkpoint.json"
+        self.failures_path = f"results/{month}/batch_failures.json"
+
+    @staticmethod
+    def load_clans(path: str) -> list[BatchClan]:
+        # one clan per line: tag[,alias[,name]], lines starting with # followed by a space are comments
+        clans = []
+        with open(path, "r") as f:
+            for row in csv.reader(f):
+                row = [value.strip() for value in row]
+                if not row or not row[0] or row[0].startswith("# "):
+                    continue
+
+                tag = row[0]
+                alias = row[1] if len(row) > 1 and row[1] else tag.lstrip("#")
+                name = row[2] if len(row) > 2 and row[2] else None
+                clans.append(BatchClan(alias, tag, name))
+
+        return clans
+
+    def run(self, clans: list[BatchClan]) -> list[BatchOutcome]:
+        os.makedirs(f"results/{self.month}", exist_ok=True)
+        checkpoint = {} if self.restart else self.__load_checkpoint()
+        parameters = self.__get_parameters()
+        pending = [
+            clan
+            for clan in clans
+            if checkpoint.get(clan.alias, {}).get("status") != "done"
+            or checkpoint[clan.alias].get("parameters") != parameters
+        ]
+        logger.info(f"Batch of {len(clans)} clans, {len(clans) - len(pending)} already done, {len(pending)} to run")
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.key_rate / self.workers,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _run_clan,
+                    clan,
+                    self.month,
+                    self.recheck,
+                    self.force,
+                    self.images,
+                    self.scoring_rules,
+                    self.chart_backend,
+                )
+                for clan in pending
+            ]
+            for future in as_completed(futures):
+                outcome = future.result()
+                outcome.parameters = parameters
+                checkpoint[outcome.alias] = asdict(outcome)
+                self.__save_json(self.checkpoint_path, checkpoint)
+                logger.info(f"{outcome.alias} {outcome.status} ({len(checkpoint)}/{len(clans)})")
+
+        outcomes = [BatchOutcome(**checkpoint[clan.alias]) for clan in clans if clan.alias in checkpoint]
+        failures = [asdict(outcome) for outcome in outcomes if outcome.status != "done"]
+        self.__save_json(self.failures_path, failures)
+        if failures:
+            logger.warning(f"{len(failures)} clans failed, see {self.failures_path}")
+
+        return outcomes
+
+    def ingest_war_history(self, clans: list[BatchClan]) -> None:
+        api = CocApiService(rate=self.key_rate)
+        ingestor = WarHistoryIngestor(api, CwlAnalyzer(scoring_rules=self.scoring_rules, api=api))
+        histories = ingestor.ingest([clan.tag for clan in clans])
+        export_war_history(
+            histories,
+            [(clan.alias, clan.tag, clan.name or clan.alias) for clan in clans],
+            self.month,
+            f"results/{self.month}/war_history.npz",
+        )
+
+    def __get_parameters(self) -> dict:
+        return {
+            "recheck": self.recheck,
+            "force": self.force,
+            "images": self.images,
+            "scoring_rules": self.scoring_rules,
+            "chart_backend": self.chart_backend,
+        }
+
+    def __load_checkpoint(self) -> dict[str, dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+
+        with open(self.checkpoint_path, "r") as f:
+            return json.loads(f.read())
+
+    @staticmethod
+    def __save_json(path: str, data) -> None:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_path, path)
+
+
+_worker_api: Optional[CocApiService] = None
+
+
+def _init_worker(rate: float) -> None:
+    global _worker_api
+    _worker_api = CocApiService(rate=rate)
+
+
+def _run_clan(
+    clan: BatchClan, month: str, recheck: bool, force: bool, images: bool, scoring_rules: str, chart_backend: str
+) -> BatchOutcome:
+    try:
+        name = clan.name or _worker_api.get_clan_info(clan.tag)["name"]
+        # one manifest per clan so workers never write the same file
+        artifacts = ArtifactCache(month, force=force, name=f"{clan.alias}_artifacts")
+        analyzer = CwlAnalyzer(
+            recheck=recheck,
+            chart_backend=chart_backend,
+            scoring_rules=scoring_rules,
+            artifacts=artifacts,
+            api=_worker_api,
+        )
+        analyzer.analyze(clan.tag, clan.alias, name, month)
+        if images:
+            ResultsGenerator(month, clan.alias, clan.tag, name, analyzer, artifacts=artifacts).generate()
+        analyzer.summary().save(month)
+    except Exception as e:
+        return BatchOutcome(clan.alias, clan.tag, "failed", str(e), traceback.format_exc())
+
+    return BatchOutcome(clan.alias, clan.tag, "done")
@@ -0,0 +1,242 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_PATH = "fonts/supercell-magic.ttf"
+
+# matplotlib's default figure size at 100 dpi, generators scale charts relative to this
+CHART_SIZE = (640, 480)
+
+HISTOGRAM_BINS = 20
+HISTOGRAM_COLOR = (255, 228, 196)  # bisque
+TEXT_COLOR = (255, 255, 255)
+
+STAR_COLORS = {
+    3: (31, 119, 180),  # tab:blue
+    2: (44, 160, 44),  # tab:green
+    1: (255, 127, 14),  # tab:orange
+    0: (214, 39, 40),  # tab:red
+    "missed": (127, 127, 127),  # tab:gray
+}
+STAR_COLOR_NAMES = {3: "tab:blue", 2: "tab:green", 1: "tab:orange", 0: "tab:red", "missed": "tab:gray"}
+
+
+def format_pie_value(pct: float, total: float) -> str:
+    return "{p:.2f}%  ({v:d})".format(p=pct, v=int(round(pct * total / 100.0)))
+
+
+class ChartRenderer(ABC):
+    @abstractmethod
+    def destruction_histogram(self, destruction: list[float], title: str, path: str) -> None:
+        pass
+
+    @abstractmethod
+    def star_pie(self, star_counts: dict[Union[int, str], int], path: str) -> None:
+        pass
+
+
+class PilChartRenderer(ChartRenderer):
+    def __init__(self, size: tuple[int, int] = CHART_SIZE, supersample: int = 2) -> None:
+        self.size = size
+        self.supersample = supersample
+
+    def destruction_histogram(self, destruction: list[float], title: str, path: str) -> None:
+        image, draw, scale = self.__new_canvas()
+        w, h = image.size
+
+        # same subplot margins as matplotlib defaults
+        left, right, top, bottom = int(w * 0.125), int(w * 0.9), int(h * 0.12), int(h * 0.89)
+        bins = [0] * HISTOGRAM_BINS
+        for value in destruction:
+            bins[min(int(value / (100 / HISTOGRAM_BINS)), HISTOGRAM_BINS - 1)] += 1
+
+        y_max = max(bins, default=0) * 1.05 or 1
+        bin_width = (right - left) / HISTOGRAM_BINS
+        for i, count in enumerate(bins):
+            if count:
+                bar_top = bottom - count / y_max * (bottom - top)
+                draw.rectangle(
+                    (left + i * bin_width, bar_top, left + (i + 1) * bin_width, bottom), fill=HISTOGRAM_COLOR
+                )
+
+        line_width = max(1, round(scale))
+        draw.rectangle((left, top, right, bottom), outline=TEXT_COLOR, width=line_width)
+
+        tick_font = self.__font(10 * scale)
+        tick_length = 4 * scale
+        for value in range(0, 101, 20):
+            x = left + value / 100 * (right - left)
+            draw.line((x, bottom, x, bottom + tick_length), fill=TEXT_COLOR, width=line_width)
+            draw.text((x, bottom + 2 * tick_length), str(value), font=tick_font, fill=TEXT_COLOR, anchor="mt")
+
+        step = self.__tick_step(y_max)
+        for value in range(0, int(y_max) + 1, step):
+            y = bottom - value / y_max * (bottom - top)
+            draw.line((left - tick_length, y, left, y), fill=TEXT_COLOR, width=line_width)
+            draw.text((left - 2 * tick_length, y), str(value), font=tick_font, fill=TEXT_COLOR, anchor="rm")
+
+        label_font = self.__font(10 * scale)
+        draw.text(((left + right) / 2, h - 6 * scale), "Destruction (%)", font=label_font, fill=TEXT_COLOR, anchor="md")
+        # drawn horizontally and rotated, x becomes the distance from the bottom edge
+        label = Image.new("RGBA", (h, round(20 * scale)), (0, 0, 0, 0))
+        ImageDraw.Draw(label).text(
+            (h - (top + bottom) / 2, 10 * scale), "Attack count", font=label_font, fill=TEXT_COLOR, anchor="mm"
+        )
+        image.alpha_composite(label.rotate(90, expand=True), (round(4 * scale), 0))
+
+        draw.text(
+            ((left + right) / 2, top - 8 * scale), title, font=self.__font(25 * scale), fill=TEXT_COLOR, anchor="md"
+        )
+        self.__save(image, path)
+
+    def star_pie(self, star_counts: dict[Union[int, str], int], path: str) -> None:
+        self.render_star_pie(star_counts).save(path)
+
+    def render_star_pie(self, star_counts: dict[Union[int, str], int]) -> Image.Image:
+        image, draw, scale = self.__new_canvas()
+        w, h = image.size
+
+        radius = min(w, h) * 0.31
+        center_x, center_y = w / 2, h / 2
+        total = float(sum(star_counts.values()))
+        value_font = self.__font(16 * scale)
+
+        # matplotlib starts at 3 o'clock and goes counter clockwise, pillow angles go clockwise
+        start = 0.0
+        labels = []
+        for key, count in star_counts.items():
+            sweep = 360.0 * count / total if total else 0.0
+            middle = math.radians(start + sweep / 2)
+            offset = 0.1 * radius if key == 3 else 0.0
+            cx = center_x + math.cos(middle) * offset
+            cy = center_y - math.sin(middle) * offset
+
+            bounds = (cx - radius, cy - radius, cx + radius, cy + radius)
+            if sweep >= 360.0:
+                draw.ellipse(bounds, fill=STAR_COLORS[key])
+            elif sweep > 0:
+                draw.pieslice(bounds, -(start + sweep), -start, fill=STAR_COLORS[key])
+
+            labels.append((key, count, cx, cy, middle))
+            start += sweep
+
+        # text goes on top of every slice
+        for key, count, cx, cy, middle in labels:
+            draw.text(
+                (cx + math.cos(middle) * radius * 0.6, cy - math.sin(middle) * radius * 0.6),
+                format_pie_value(100 * count / total, total),
+                font=value_font,
+                fill=TEXT_COLOR,
+                anchor="mm",
+            )
+
+            label_position = (cx + math.cos(middle) * radius * 1.1, cy - math.sin(middle) * radius * 1.1)
+            self.__draw_pie_label(draw, key, label_position, math.cos(middle) >= 0, value_font)
+
+        return self.__downsample(image)
+
+    def __draw_pie_label(
+        self, draw: ImageDraw, key: Union[int, str], position: tuple[float, float], right: bool, font: ImageFont
+    ) -> None:
+        x, y = position
+        if not isinstance(key, int):
+            draw.text((x, y), key, font=font, fill=TEXT_COLOR, anchor="lm" if right else "rm")
+            return
+
+        # the supercell font has no star glyph, so it is drawn as a polygon after the number
+        text = str(key)
+        text_width = draw.textlength(text, font=font)
+        star_radius = font.size * 0.45
+        width = text_width + 2 * star_radius
+        x0 = x if right else x - width
+        draw.text((x0, y), text, font=font, fill=TEXT_COLOR, anchor="lm")
+
+        star_x = x0 + text_width + star_radius
+        points = []
+        for i in range(10):
+            angle = math.radians(90 + i * 36)
+            r = star_radius if i % 2 == 0 else star_radius * 0.45
+            points.append((star_x + math.cos(angle) * r, y - math.sin(angle) * r))
+        draw.polygon(points, fill=TEXT_COLOR)
+
+    def __new_canvas(self) -> tuple[Image.Image, ImageDraw.ImageDraw, float]:
+        image = Image.new("RGBA", (self.size[0] * self.supersample, self.size[1] * self.supersample), (0, 0, 0, 0))
+        # chart dimensions are given in pixels of a 640x480 chart
+        scale = self.supersample * self.size[0] / CHART_SIZE[0]
+        return image, ImageDraw.Draw(image), scale
+
+    def __save(self, image: Image.Image, path: str) -> None:
+        self.__downsample(image).save(path)
+
+    def __downsample(self, image: Image.Image) -> Image.Image:
+        return image.resize(self.size, Image.Resampling.LANCZOS)
+
+    @staticmethod
+    def __font(size: float) -> ImageFont.FreeTypeFont:
+        return ImageFont.truetype(FONT_PATH, round(size))
+
+    @staticmethod
+    def __tick_step(y_max: float) -> int:
+        raw_step = y_max / 6
+        magnitude = 10 ** max(0, math.floor(math.log10(raw_step))) if raw_step >= 1 else 1
+        for multiplier in (1, 2, 5, 10):
+            if magnitude * multiplier >= raw_step:
+                return magnitude * multiplier
+        return magnitude * 10
+
+
+class MatplotlibChartRenderer(ChartRenderer):
+    def __init__(self) -> None:
+        import matplotlib as mpl
+        import matplotlib.font_manager as fm
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        COLOR = "white"
+        mpl.rcParams["text.color"] = COLOR
+        mpl.rcParams["axes.labelcolor"] = COLOR
+        mpl.rcParams["xtick.color"] = COLOR
+        mpl.rcParams["ytick.color"] = COLOR
+        mpl.rcParams["font.weight"] = "bold"
+
+        font_properties = fm.FontProperties(fname=FONT_PATH)
+        self.title_kwargs = {"fontproperties": font_properties, "fontsize": 18}
+        self.label_kwargs = {"fontweight": "bold"}
+
+    def destruction_histogram(self, destruction: list[float], title: str, path: str) -> None:
+        plt = self.plt
+        plt.hist(destruction, bins=HISTOGRAM_BINS, range=(0, 100), color="bisque")
+        plt.title(title, **self.title_kwargs)
+        plt.xlabel("Destruction (%)", **self.label_kwargs)
+        plt.ylabel("Attack count", **self.label_kwargs)
+        plt.savefig(path, transparent=True)
+        plt.clf()
+
+    def star_pie(self, star_counts: dict[Union[int, str], int], path: str) -> None:
+        plt = self.plt
+        pie_vals = [float(v) for v in star_counts.values()]
+        plt.pie(
+            pie_vals,
+            labels=[f"{key}★" if isinstance(key, int) else key for key in star_counts.keys()],
+            autopct=lambda pct: format_pie_value(pct, sum(pie_vals)),
+            colors=[STAR_COLOR_NAMES[key] for key in star_counts.keys()],
+            explode=[0.1 if key == 3 else 0 for key in star_counts.keys()],
+            textprops={"fontsize": 16},
+        )
+        plt.savefig(path, transparent=True)
+        plt.clf()
+
+
+CHART_BACKENDS = {
+    "pil": PilChartRenderer,
+    "matplotlib": MatplotlibChartRenderer,
+}
+
+
+def get_chart_renderer(backend: str) -> ChartRenderer:
+    if backend not in CHART_BACKENDS:
+        raise Exception(f"Unknown chart backend {backend}, expected one of {', '.join(CHART_BACKENDS)}")
+
+    return CHART_BACKENDS[backend]()
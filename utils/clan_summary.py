@@ -0,0 +1,44 @@
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Union
+
+from utils.league import PromotionStatus
+
+
+@dataclass
+class ClanSummary:
+    alias: str
+    tag: str
+    name: str
+    badge_url: str
+    league_name: str
+    placement: Optional[int]
+    promotion_status: PromotionStatus
+    # stars per attack ("3", "2", "1", "0") and "missed", as strings so the summary round trips through json
+    star_counts: dict[str, int] = field(default_factory=dict)
+    analysis_fingerprint: Optional[str] = None
+
+    def get_pie_star_counts(self) -> dict[Union[int, str], int]:
+        # same order as the per clan stars chart: 3 to 0 stars, then missed, empty slices left out
+        counts = {int(stars): count for stars, count in self.star_counts.items() if stars != "missed"}
+        counts = {stars: counts[stars] for stars in sorted(counts, reverse=True)}
+        counts["missed"] = self.star_counts.get("missed", 0)
+        return {key: count for key, count in counts.items() if count > 0}
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["promotion_status"] = self.promotion_status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ClanSummary":
+        return cls(**{**data, "promotion_status": PromotionStatus(data["promotion_status"])})
+
+    def save(self, month: str) -> None:
+        with open(f"results/{month}/{self.alias}_summary.json", "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    @classmethod
+    def load(cls, month: str, alias: str) -> "ClanSummary":
+        with open(f"results/{month}/{alias}_summary.json", "r") as f:
+            return cls.from_dict(json.loads(f.read()))
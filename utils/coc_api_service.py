@@ -1,18 +1,37 @@
 import logging
 import os
-from urllib.parse import quote, urljoin
+import time
+from typing import Optional
+from urllib.parse import quote, urlencode, urljoin
 
 import requests
 from dotenv import load_dotenv
 
+from utils.token_pool import TokenPool
+
+# status codes that mean the key is throttled or rejected, the request is retried on another key
+QUARANTINE_STATUS_CODES = (403, 429)
+
+# seconds before the first retry of a 5xx response, doubled for every further retry
+RETRY_BACKOFF = 0.5
+
 
 class CocApiService:
-    def __init__(self):
+    def __init__(self, rate: Optional[float] = None):
         load_dotenv()
-        self.token = os.getenv("COC_API_TOKEN")
+        # COC_API_TOKENS is a comma separated list of keys, COC_API_TOKEN is kept for single key setups
+        tokens = os.getenv("COC_API_TOKENS") or os.getenv("COC_API_TOKEN") or ""
+        self.tokens = [token.strip() for token in tokens.split(",") if token.strip()]
         self.base_url = os.getenv("COC_API_URL")
+        self.rate = rate or float(os.getenv("COC_API_RATE", "10"))
+        self.retries = int(os.getenv("COC_API_RETRIES", "3"))
+        self.pool = TokenPool(self.tokens, rate=self.rate)
         self.logger = logging.getLogger("analyzer")
 
+    @property
+    def request_rate(self) -> float:
+        return self.pool.request_rate
+
     def get_cwl_info(self, clan_tag: str) -> dict:
         url = urljoin(self.base_url, quote(f"clans/{clan_tag}/currentwar/leaguegroup"))
         return self.__send_get_request(url)
@@ -25,13 +44,63 @@ class CocApiService:
         url = urljoin(self.base_url, quote(f"clans/{clan_tag}"))
         return self.__send_get_request(url)
 
+    def get_war_log(self, clan_tag: str, limit: Optional[int] = None, after: Optional[str] = None) -> dict:
+        url = urljoin(self.base_url, quote(f"clans/{clan_tag}/warlog"))
+        params = {key: value for key, value in (("limit", limit), ("after", after)) if value is not None}
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        return self.__send_get_request(url)
+
+    def get_current_war(self, clan_tag: str) -> dict:
+        url = urljoin(self.base_url, quote(f"clans/{clan_tag}/currentwar"))
+        return self.__send_get_request(url)
+
+    def get_leagues(self) -> dict:
+        return self.__send_get_request(urljoin(self.base_url, "leagues"))
+
+    def get_war_leagues(self) -> dict:
+        return self.__send_get_request(urljoin(self.base_url, "warleagues"))
+
     def __send_get_request(self, url: str) -> dict:
         self.logger.info(f"Calling coc api {url}")
-        response = requests.get(url, headers=self.__get_auth_header())
-        if response.status_code == 200:
-            return response.json()
+        quarantines, server_errors = 0, 0
+        while True:
+            key = self.pool.acquire()
+            try:
+                response = requests.get(url, headers=self.__get_auth_header(key.token))
+            finally:
+                self.pool.release(key)
+
+            if response.status_code == 200:
+                return response.json()
+
+            if self.__should_quarantine(response) and quarantines < 2 * len(self.pool.keys):
+                self.logger.warning(f"Coc api key ...{key.token[-6:]} returned {response.status_code}, quarantining it")
+                self.pool.quarantine(key)
+                quarantines += 1
+            elif response.status_code >= 500 and server_errors < self.retries:
+                self.logger.warning(f"Coc api returned {response.status_code}, retrying")
+                time.sleep(RETRY_BACKOFF * 2**server_errors)
+                server_errors += 1
+            else:
+                break
 
         raise Exception(f"Error calling coc api: {response.status_code} {response.text}")
 
-    def __get_auth_header(self):
-        return {"Authorization": f"Bearer {self.token}"}
+    @staticmethod
+    def __should_quarantine(response: requests.Response) -> bool:
+        if response.status_code not in QUARANTINE_STATUS_CODES:
+            return False
+
+        # accessDenied is returned both for a private war log and for an invalid or revoked key, only the
+        # message tells them apart
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        message = data.get("message") or ""
+        private_resource = data.get("reason") == "accessDenied" and not message.startswith("Invalid authorization")
+        return not (response.status_code == 403 and private_resource)
+
+    def __get_auth_header(self, token: str):
+        return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,141 @@
+import csv
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from utils.cwl_analyzer import CwlAnalysisResult
+from utils.league_registry import LeagueRegistry
+
+# multiplier added to positive scores per war league tier above the lowest league in the family
+LEAGUE_TIER_BONUS = 0.05
+
+# town hall differences beyond this are bucketed together when normalising matchups
+MAX_TH_DIFFERENCE_BUCKET = 3
+
+
+@dataclass
+class PlayerRollup:
+    tag: str
+    name: str
+    clans: list[str] = field(default_factory=list)
+    wars: int = 0
+    attacks: int = 0
+    missed_attacks: int = 0
+    stars: int = 0
+    destruction: float = 0.0
+    score: float = 0.0
+    normalized_score: float = 0.0
+
+    @property
+    def average_score(self) -> float:
+        return self.score / self.wars if self.wars else 0.0
+
+    @property
+    def average_normalized_score(self) -> float:
+        return self.normalized_score / self.wars if self.wars else 0.0
+
+
+class FamilyLeaderboard:
+    def __init__(self, registry: Optional[LeagueRegistry] = None) -> None:
+        self.registry = registry or LeagueRegistry.get()
+        self.players: dict[str, PlayerRollup] = {}
+        # (tier, th difference bucket) -> attack scores per player, and the family wide [sum, count] per bucket
+        self.__player_buckets: dict[str, dict[tuple, list[float]]] = defaultdict(lambda: defaultdict(list))
+        self.__bucket_totals: dict[Optional[int], list] = defaultdict(lambda: [0.0, 0])
+        self.__tiers: set[int] = set()
+
+    def add_clan(self, result: CwlAnalysisResult, league_name: str) -> None:
+        league = self.registry.by_name(league_name)
+        tier = league.tier if league else 0
+        self.__tiers.add(tier)
+
+        for attack in result.attacks:
+            if not (attack.attacked or attack.missed_attack):
+                continue
+
+            player = self.players.get(attack.player_tag)
+            if player is None:
+                player = self.players[attack.player_tag] = PlayerRollup(attack.player_tag, attack.player_name)
+            if result.clan_alias not in player.clans:
+                player.clans.append(result.clan_alias)
+
+            player.wars += 1
+            player.score += attack.score
+            if attack.missed_attack:
+                player.missed_attacks += 1
+            if attack.attacked:
+                player.attacks += 1
+                player.stars += attack.stars
+                player.destruction += attack.destruction
+
+            bucket = self.__get_th_bucket(attack.attacker_th, attack.defender_th) if attack.attacked else None
+            self.__player_buckets[attack.player_tag][(tier, bucket)].append(attack.score)
+            self.__bucket_totals[bucket][0] += attack.score
+            self.__bucket_totals[bucket][1] += 1
+
+    def leaderboard(self, key: str = "average_normalized_score") -> list[PlayerRollup]:
+        self.__normalize()
+        return sorted(self.players.values(), key=lambda player: getattr(player, key), reverse=True)
+
+    def save_csv(self, path: str, key: str = "average_normalized_score") -> None:
+        with open(path, "w") as f:
+            writer = csv.writer(f)
+            header = [
+                "rank",
+                "name",
+                "tag",
+                "clans",
+                "wars participated",
+                "attacks",
+                "missed attacks",
+                "stars",
+                "score",
+                "avg score",
+                "normalized score",
+                "avg normalized score",
+            ]
+            writer.writerow(header)
+            for rank, player in enumerate(self.leaderboard(key), start=1):
+                writer.writerow(
+                    [
+                        rank,
+                        player.name,
+                        player.tag,
+                        " ".join(player.clans),
+                        player.wars,
+                        player.attacks,
+                        player.missed_attacks,
+                        player.stars,
+                        player.score,
+                        player.average_score,
+                        player.normalized_score,
+                        player.average_normalized_score,
+                    ]
+                )
+
+    def __normalize(self) -> None:
+        # scores are shifted by how far they are from the family average for their th matchup, then positive
+        # scores are scaled by league tier so a higher league never makes a bad attack cost more.
+        # missed attacks (bucket None) are not shifted.
+        attacked = [totals for bucket, totals in self.__bucket_totals.items() if bucket is not None]
+        attacked_count = sum(count for _, count in attacked)
+        overall_mean = sum(total for total, _ in attacked) / attacked_count if attacked_count else 0.0
+        bucket_offsets = {
+            bucket: (total / count - overall_mean) if bucket is not None and count else 0.0
+            for bucket, (total, count) in self.__bucket_totals.items()
+        }
+        lowest_tier = min(self.__tiers, default=0)
+
+        for tag, buckets in self.__player_buckets.items():
+            normalized_score = 0.0
+            for (tier, bucket), scores in buckets.items():
+                tier_factor = 1 + LEAGUE_TIER_BONUS * (tier - lowest_tier)
+                for score in scores:
+                    shifted = score - bucket_offsets[bucket]
+                    normalized_score += shifted * tier_factor if shifted > 0 else shifted
+            self.players[tag].normalized_score = normalized_score
+
+    @staticmethod
+    def __get_th_bucket(attacker_th: int, defender_th: int) -> int:
+        difference = attacker_th - defender_th
+        return max(-MAX_TH_DIFFERENCE_BUCKET, min(MAX_TH_DIFFERENCE_BUCKET, difference))
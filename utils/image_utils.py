@@ -1,15 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from io import BytesIO
+from typing import Optional
 
 import requests
 from PIL import Image, ImageDraw, ImageFont
 
 
+@dataclass
+class ImageVariant:
+    format: str
+    suffix: str = ""
+    scale: float = 1.0
+    colors: Optional[int] = None  # quantize to a palette of this size
+    options: dict = field(default_factory=dict)
+
+    @property
+    def extension(self) -> str:
+        return self.format.lower()
+
+
+DEFAULT_VARIANTS = [
+    ImageVariant("PNG", options={"optimize": True}),
+    ImageVariant("WEBP", options={"quality": 80, "method": 6}),
+    ImageVariant("PNG", suffix="_thumb", scale=0.25, colors=256, options={"optimize": True}),
+]
+
+
 class ImageUtils:
     @staticmethod
     def get_image_from_url(url: str) -> Image:
         response = requests.get(url)
         return Image.open(BytesIO(response.content))
 
+    @staticmethod
+    def save_variants(image: Image, base_path: str, variants: Optional[list[ImageVariant]] = None) -> list[str]:
+        variants = DEFAULT_VARIANTS if variants is None else variants
+        # resized copies are shared between variants of the same scale
+        scaled = {}
+        for variant in variants:
+            if variant.scale not in scaled:
+                scaled[variant.scale] = ImageUtils.__scale(image, variant.scale)
+
+        def save(variant: ImageVariant) -> str:
+            path = ImageUtils.variant_path(base_path, variant)
+            encoded = scaled[variant.scale]
+            if variant.colors:
+                encoded = encoded.quantize(variant.colors, method=ImageUtils.__quantize_method(encoded))
+            encoded.save(path, variant.format, **variant.options)
+            return path
+
+        with ThreadPoolExecutor(max_workers=len(variants) or 1) as executor:
+            return list(executor.map(save, variants))
+
+    @staticmethod
+    def variant_path(base_path: str, variant: ImageVariant) -> str:
+        return f"{base_path}{variant.suffix}.{variant.extension}"
+
+    @staticmethod
+    def variant_paths(base_path: str, variants: Optional[list[ImageVariant]] = None) -> list[str]:
+        variants = DEFAULT_VARIANTS if variants is None else variants
+        return [ImageUtils.variant_path(base_path, variant) for variant in variants]
+
+    @staticmethod
+    def __scale(image: Image, scale: float) -> Image:
+        if scale == 1.0:
+            return image
+
+        w, h = image.size
+        return image.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.Resampling.LANCZOS)
+
+    @staticmethod
+    def __quantize_method(image: Image) -> Image.Quantize:
+        # median cut does not support images with an alpha channel
+        return Image.Quantize.FASTOCTREE if image.mode == "RGBA" else Image.Quantize.MEDIANCUT
+
     @staticmethod
     def overlay_image(background: Image, overlay: Image, offset: tuple[int] = (0, 0)):
         background.paste(overlay, offset, overlay)
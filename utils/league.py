@@ -1,11 +1,11 @@
 import logging
-import re
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
 from utils.coc_api_service import CocApiService
+from utils.league_registry import LeagueRegistry
 from utils.war import War
 
 logger = logging.getLogger("league")
@@ -23,21 +23,6 @@ class ClanStanding:
     destruction: float
 
 
-# number of clans promoted per league
-PROMOTIONS = {
-    r"Gold.*": 2,
-    r"Crystal I": 1,
-    r"Crystal.*": 2,
-    r"Master.*": 1,
-    r"Champion.*": 1,
-}
-
-# number of clans demoted per league
-DEMOTIONS = {
-    r".*": 2,
-}
-
-
 class League:
     def __init__(self, league_info: dict, clan_tag: str, api: Optional[CocApiService] = None):
         self.league_info = league_info
@@ -52,6 +37,20 @@ class League:
         self.standings = self.__get_standings()
         self.__get_promotions()
 
+    def __getstate__(self) -> dict:
+        # the api holds the key pool, it is not part of the league data and is rebuilt on load
+        state = self.__dict__.copy()
+        del state["api"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.api = CocApiService()
+
+    def get_war_rounds(self) -> list[int]:
+        # wars are parsed round by round, so this is the round of every war in self.wars
+        return [index for index, round in enumerate(self.league_info["rounds"]) for _ in round["warTags"]]
+
     def __get_standings(self) -> list[dict]:
         # sort by stars, then destruction
         clan_totals = defaultdict(lambda: ClanStanding(0, 0.0))
@@ -101,8 +100,9 @@ class League:
                 self.wars.append(war)
 
     def __get_promotions(self):
-        promotions = next((value for regex, value in PROMOTIONS.items() if re.match(regex, self.clan_league)), None)
-        demotions = next((value for regex, value in DEMOTIONS.items() if re.match(regex, self.clan_league)), None)
+        league_entry = LeagueRegistry.get().by_name(self.clan_league)
+        promotions = league_entry.promotions if league_entry else 0
+        demotions = league_entry.demotions if league_entry else 0
         self.placement = next(
             (i + 1 for i, clan in enumerate(self.standings) if clan["tag"] == self.clan_tag),
             None,
@@ -0,0 +1,145 @@
+import json
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.coc_api_service import CocApiService
+
+LEAGUES_PATH = "response_samples/leagues.json"
+WAR_LEAGUES_PATH = "response_samples/warleagues.json"
+
+# number of clans promoted and demoted per war league, leagues missing here keep their clans where they are
+PROMOTIONS = {
+    "Unranked": 0,
+    "Bronze League III": 3,
+    "Bronze League II": 3,
+    "Bronze League I": 3,
+    "Silver League III": 2,
+    "Silver League II": 2,
+    "Silver League I": 2,
+    "Gold League III": 2,
+    "Gold League II": 2,
+    "Gold League I": 2,
+    "Crystal League III": 2,
+    "Crystal League II": 2,
+    "Crystal League I": 1,
+    "Master League III": 1,
+    "Master League II": 1,
+    "Master League I": 1,
+    "Champion League III": 1,
+    "Champion League II": 1,
+    "Champion League I": 1,
+}
+
+DEMOTIONS = {
+    "Unranked": 0,
+    "Bronze League III": 0,
+    "Bronze League II": 1,
+    "Bronze League I": 1,
+    "Silver League III": 1,
+    "Silver League II": 1,
+    "Silver League I": 1,
+    "Gold League III": 2,
+    "Gold League II": 2,
+    "Gold League I": 2,
+    "Crystal League III": 2,
+    "Crystal League II": 2,
+    "Crystal League I": 2,
+    "Master League III": 2,
+    "Master League II": 2,
+    "Master League I": 2,
+    "Champion League III": 2,
+    "Champion League II": 2,
+    "Champion League I": 2,
+}
+
+
+@dataclass(frozen=True)
+class LeagueEntry:
+    id: int
+    name: str
+    tier: int
+    icon_urls: dict
+    promotions: int
+    demotions: int
+
+
+class LeagueRegistry:
+    __instance: Optional["LeagueRegistry"] = None
+    __lock = threading.Lock()
+
+    def __init__(self, war_leagues: list[dict], leagues: list[dict]) -> None:
+        icon_urls = {league["name"]: league.get("iconUrls", {}) for league in leagues}
+
+        # war leagues are returned from lowest to highest
+        self.leagues = [
+            LeagueEntry(
+                league["id"],
+                league["name"],
+                tier,
+                icon_urls.get(league["name"], {}),
+                PROMOTIONS.get(league["name"], 0),
+                DEMOTIONS.get(league["name"], 0),
+            )
+            for tier, league in enumerate(war_leagues)
+        ]
+        self.__by_name = {league.name: league for league in self.leagues}
+        self.__by_id = {league.id: league for league in self.leagues}
+
+    @classmethod
+    def get(cls) -> "LeagueRegistry":
+        if cls.__instance is None:
+            with cls.__lock:
+                if cls.__instance is None:
+                    cls.__instance = cls.__load()
+
+        return cls.__instance
+
+    @classmethod
+    def refresh(cls, api: Optional[CocApiService] = None) -> "LeagueRegistry":
+        api = api or CocApiService()
+        leagues = api.get_leagues()
+        war_leagues = api.get_war_leagues()
+
+        with cls.__lock:
+            with open(LEAGUES_PATH, "w") as f:
+                json.dump(leagues, f, indent=4)
+            with open(WAR_LEAGUES_PATH, "w") as f:
+                json.dump(war_leagues, f, indent=4)
+
+            cls.__instance = cls(war_leagues["items"], leagues["items"])
+
+        return cls.__instance
+
+    def by_name(self, name: str) -> Optional[LeagueEntry]:
+        return self.__by_name.get(name)
+
+    def by_id(self, league_id: int) -> Optional[LeagueEntry]:
+        return self.__by_id.get(league_id)
+
+    def icon_url(self, name: str, size: str = "medium") -> Optional[str]:
+        league = self.__by_name.get(name)
+        return league.icon_urls.get(size) if league else None
+
+    def next_league(self, name: str) -> Optional[LeagueEntry]:
+        league = self.__by_name.get(name)
+        if league is None or league.tier + 1 >= len(self.leagues):
+            return None
+
+        return self.leagues[league.tier + 1]
+
+    def previous_league(self, name: str) -> Optional[LeagueEntry]:
+        league = self.__by_name.get(name)
+        if league is None or league.tier == 0:
+            return None
+
+        return self.leagues[league.tier - 1]
+
+    @classmethod
+    def __load(cls) -> "LeagueRegistry":
+        with open(LEAGUES_PATH, "r") as f:
+            leagues = json.loads(f.read())
+        with open(WAR_LEAGUES_PATH, "r") as f:
+            war_leagues = json.loads(f.read())
+
+        return cls(war_leagues["items"], leagues["items"])
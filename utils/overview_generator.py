@@ -1,56 +1,83 @@
-import json
 from typing import Optional
 
 from PIL import Image, ImageDraw, ImageEnhance, ImageFont
 
-from utils.cwl_analyzer import CwlAnalyzer
-from utils.image_utils import ImageUtils
+from utils.artifacts import ArtifactCache
+from utils.charts import FONT_PATH, PilChartRenderer
+from utils.clan_summary import ClanSummary
+from utils.image_utils import ImageUtils, ImageVariant
 from utils.league import PromotionStatus
+from utils.league_registry import LeagueRegistry
 
 
 class OverviewGenerator:
     def __init__(
         self,
         month: str,
-        clans: dict[str, CwlAnalyzer],
+        clans: dict[str, ClanSummary],
         comment: Optional[str] = None,
+        variants: Optional[list[ImageVariant]] = None,
+        artifacts: Optional[ArtifactCache] = None,
     ) -> None:
         self.month = month.upper()
         self.clans = clans
         self.comment = comment or ""
+        self.variants = variants
+        self.artifacts = artifacts
+
+    @classmethod
+    def from_saved(cls, month: str, aliases: list[str], **kwargs) -> "OverviewGenerator":
+        return cls(month, {alias: ClanSummary.load(month.upper(), alias) for alias in aliases}, **kwargs)
 
     def generate(self):
+        base_path = f"results/{self.month}/all_overview"
+        outputs = ImageUtils.variant_paths(base_path, self.variants)
+        fingerprint = self.__get_fingerprint()
+        if self.artifacts and self.artifacts.is_fresh("all_overview", fingerprint, outputs):
+            return
+
         background = Image.open("media/background-2.png")
         enhancer = ImageEnhance.Brightness(background)
         background = enhancer.enhance(0.7)
 
-        with open("response_samples/leagues.json", "r") as f:
-            leagues = json.loads(f.read())
-
         self.clan_count = len(self.clans)
 
-        for i, (clan_alias, analyzer) in enumerate(self.clans.items()):
-            clan_badge_url = analyzer.league.clan_info["badgeUrls"]["medium"]
-
-            league_icon_url = next(
-                (
-                    league["iconUrls"]["medium"]
-                    for league in leagues["items"]
-                    if league["name"] == analyzer.league.clan_league
-                ),
-                None,
-            )
+        for i, (clan_alias, summary) in enumerate(self.clans.items()):
+            league_icon_url = LeagueRegistry.get().icon_url(summary.league_name)
             league = ImageUtils.get_image_from_url(league_icon_url)
-            clan_badge = ImageUtils.get_image_from_url(clan_badge_url)
+            clan_badge = ImageUtils.get_image_from_url(summary.badge_url)
 
-            background = self.__overlay_league(background, league, analyzer, i)
+            background = self.__overlay_league(background, league, summary, i)
             background = self.__overlay_badge(background, clan_badge, i)
-            background = self.__write_clan_name(background, analyzer, i)
-            background = self.__overlay_results(background, clan_alias, i)
-
-        background.save(f"results/{self.month}/all_overview.png")
+            background = self.__write_clan_name(background, summary, i)
+            background = self.__overlay_results(background, summary, i)
+
+        ImageUtils.save_variants(background, base_path, self.variants)
+        if self.artifacts:
+            self.artifacts.record("all_overview", fingerprint, outputs)
+
+    def __get_fingerprint(self) -> str:
+        clans = [
+            (
+                clan_alias,
+                summary.name,
+                summary.badge_url,
+                summary.league_name,
+                summary.placement,
+                summary.promotion_status.value,
+                summary.star_counts,
+            )
+            for clan_alias, summary in self.clans.items()
+        ]
+        return ArtifactCache.fingerprint(
+            self.comment,
+            self.variants,
+            ArtifactCache.file_digest("media/background-2.png"),
+            ArtifactCache.file_digest(FONT_PATH),
+            clans,
+        )
 
-    def __overlay_league(self, background: Image, league: Image, analyzer: CwlAnalyzer, clan_index: int):
+    def __overlay_league(self, background: Image, league: Image, summary: ClanSummary, clan_index: int):
         bg_w, bg_h = background.size
         img_w, img_h = league.size
         league = league.resize((int(img_w / 5), int(img_h / 5)))
@@ -66,7 +93,7 @@ class OverviewGenerator:
             offset=(x_coord, bg_h - img_h - 300),  # Adjust the y-coordinate as needed
         )
 
-        promotion_status = analyzer.league.promotion_status
+        promotion_status = summary.promotion_status
         if promotion_status == PromotionStatus.NO_CHANGE:
             result_color = (255, 255, 255)
         elif promotion_status == PromotionStatus.PROMOTED:
@@ -74,7 +101,7 @@ class OverviewGenerator:
         elif promotion_status == PromotionStatus.DEMOTED:
             result_color = (255, 220, 220)
 
-        result_text = f"Placed #{analyzer.league.placement}"
+        result_text = f"Placed #{summary.placement}"
         x_spacing = background.size[0] // (self.clan_count + 1)
         x_coord = x_spacing * (clan_index + 1)
 
@@ -86,13 +113,13 @@ class OverviewGenerator:
             fill=result_color,
         )
 
-    def __write_clan_name(self, background: Image, analyzer: CwlAnalyzer, clan_index: int):
+    def __write_clan_name(self, background: Image, summary: ClanSummary, clan_index: int):
         x_spacing = background.size[0] // (self.clan_count + 1)
         x_coord = x_spacing * (clan_index + 1)
 
         return self.write_text(
             background,
-            analyzer.league.clan_info["name"],
+            summary.name,
             offset=(x_coord, -180),  # Adjust the y-coordinate as needed
             size=18,
         )
@@ -114,8 +141,9 @@ class OverviewGenerator:
             offset=(x_coord, bg_h - img_h - 400),  # Adjust the y-coordinate as needed
         )
 
-    def __overlay_results(self, background: Image, clan: str, clan_index: int):
-        stars = Image.open(f"results/{self.month}/{clan}_stars.png")
+    def __overlay_results(self, background: Image, summary: ClanSummary, clan_index: int):
+        # the pie is drawn from the summary, so the overview does not need the per clan charts on disk
+        stars = PilChartRenderer().render_star_pie(summary.get_pie_star_counts())
 
         bg_w, bg_h = background.size
 
@@ -1,11 +1,13 @@
-import json
 from typing import Optional
 
 from PIL import Image, ImageEnhance
 
+from utils.artifacts import ArtifactCache
+from utils.charts import FONT_PATH
 from utils.cwl_analyzer import CwlAnalyzer
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageVariant
 from utils.league import PromotionStatus
+from utils.league_registry import LeagueRegistry
 
 
 class ResultsGenerator:
@@ -17,6 +19,8 @@ class ResultsGenerator:
         clan_name: str,
         analyzer: CwlAnalyzer,
         comment: Optional[str] = None,
+        variants: Optional[list[ImageVariant]] = None,
+        artifacts: Optional[ArtifactCache] = None,
     ) -> None:
         self.month = month.upper()
         self.clan = clan
@@ -24,25 +28,24 @@ class ResultsGenerator:
         self.clan_name = clan_name
         self.analyzer = analyzer
         self.comment = comment or ""
+        self.variants = variants
+        self.artifacts = artifacts
 
     def generate(self):
+        clan_badge_url = self.analyzer.league.clan_info["badgeUrls"]["medium"]
+        league_icon_url = LeagueRegistry.get().icon_url(self.analyzer.league.clan_league)
+
+        base_path = f"results/{self.month}/{self.clan}_overview"
+        outputs = ImageUtils.variant_paths(base_path, self.variants)
+        stage = f"{self.clan}.overview"
+        fingerprint = self.__get_fingerprint(clan_badge_url, league_icon_url)
+        if self.artifacts and self.artifacts.is_fresh(stage, fingerprint, outputs):
+            return
+
         background = Image.open("media/background.png")
         enhancer = ImageEnhance.Brightness(background)
         background = enhancer.enhance(0.7)
 
-        clan_badge_url = self.analyzer.league.clan_info["badgeUrls"]["medium"]
-
-        with open("response_samples/leagues.json", "r") as f:
-            leagues = json.loads(f.read())
-
-        league_icon_url = next(
-            (
-                league["iconUrls"]["medium"]
-                for league in leagues["items"]
-                if league["name"] == self.analyzer.league.clan_league
-            ),
-            None,
-        )
         league = ImageUtils.get_image_from_url(league_icon_url)
         clan_badge = ImageUtils.get_image_from_url(clan_badge_url)
 
@@ -52,7 +55,32 @@ class ResultsGenerator:
         background = self.__overlay_results(background)
         background = self.__write_avg_th(background)
 
-        background.save(f"results/{self.month}/{self.clan}_overview.png")
+        ImageUtils.save_variants(background, base_path, self.variants)
+        if self.artifacts:
+            self.artifacts.record(stage, fingerprint, outputs)
+
+    def __get_fingerprint(self, clan_badge_url: str, league_icon_url: Optional[str]) -> str:
+        league = self.analyzer.league
+        return ArtifactCache.fingerprint(
+            self.clan_name,
+            self.comment,
+            clan_badge_url,
+            league_icon_url,
+            league.placement,
+            league.promotion_status.value,
+            self.analyzer.result.friendly_th_average,
+            self.analyzer.result.enemy_th_average,
+            self.variants,
+            [
+                ArtifactCache.file_digest(path)
+                for path in [
+                    "media/background.png",
+                    FONT_PATH,
+                    f"results/{self.month}/{self.clan}_destruction.png",
+                    f"results/{self.month}/{self.clan}_stars.png",
+                ]
+            ],
+        )
 
     def __overlay_league(self, background: Image, league: Image):
         bg_w, bg_h = background.size
@@ -95,12 +123,8 @@ class ResultsGenerator:
         )
 
     def __write_avg_th(self, background: Image):
-        with open(f"results/{self.month}/{self.clan}_town_halls.csv", "r") as f:
-            data = f.read()
-
-        friendly_th, enemy_th = data.split(",")
-        friendly_th = float(friendly_th)
-        enemy_th = float(enemy_th)
+        friendly_th = self.analyzer.result.friendly_th_average
+        enemy_th = self.analyzer.result.enemy_th_average
         background = ImageUtils.write_text(
             background,
             f"Average Friendly TH: {round(friendly_th ,2)}",
@@ -0,0 +1,122 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from utils.artifacts import ArtifactCache
+
+DEFAULT_SCORING_RULES_PATH = "rules/scoring_v1.json"
+
+POSITIONS = {"ahead": 0, "behind": 1}  # attacker numbered at or below the defender / above the defender
+STARS = range(4)
+# per cell: destruction multiplier, offset, position difference factor, absolute th difference factor
+COEFFICIENTS = ["multiplier", "offset", "position_factor", "th_factor"]
+
+
+@dataclass(frozen=True)
+class ScoringRule:
+    th_difference: tuple[Optional[int], Optional[int]]
+    stars: tuple[int, ...]
+    positions: tuple[int, ...]
+    coefficients: tuple[float, ...]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScoringRule":
+        position = data.get("position")
+        if position is not None and position not in POSITIONS:
+            raise Exception(f"Unknown scoring rule position {position}")
+
+        return cls(
+            tuple(data["th_difference"]),
+            tuple(data["stars"]),
+            (POSITIONS[position],) if position else tuple(POSITIONS.values()),
+            tuple(float(data.get(name, 0.0)) for name in COEFFICIENTS),
+        )
+
+    def matches(self, th_difference: int, stars: int, position: int) -> bool:
+        low, high = self.th_difference
+        return (
+            (low is None or th_difference >= low)
+            and (high is None or th_difference <= high)
+            and stars in self.stars
+            and position in self.positions
+        )
+
+
+class ScoringRules:
+    __cache: dict[tuple, "ScoringRules"] = {}
+
+    def __init__(self, data: dict, digest: str, number_difference_check: bool = False) -> None:
+        self.version = str(data["version"])
+        self.digest = digest
+        self.number_difference_check = number_difference_check
+        self.rules = [ScoringRule.from_dict(rule) for rule in data["rules"]]
+
+        # th differences past the largest rule bound all score the same, so they are clamped into one extra slot
+        bounds = [abs(bound) for rule in self.rules for bound in rule.th_difference if bound is not None]
+        self.max_th_difference = max(bounds, default=0) + 1
+        self.table = self.__compile()
+        self.__rows = self.table.tolist()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SCORING_RULES_PATH, number_difference_check: bool = False) -> "ScoringRules":
+        digest = ArtifactCache.file_digest(path)
+        key = (digest, number_difference_check)
+        if key not in cls.__cache:
+            with open(path, "r") as f:
+                cls.__cache[key] = cls(json.loads(f.read()), digest, number_difference_check)
+
+        return cls.__cache[key]
+
+    def score(self, th_difference: int, number_difference: int, stars: int, destruction: float) -> float:
+        index = max(-self.max_th_difference, min(self.max_th_difference, th_difference)) + self.max_th_difference
+        multiplier, offset, position_factor, th_factor = self.__rows[index][stars][0 if number_difference >= 0 else 1]
+        return destruction * multiplier + offset + position_factor * number_difference + th_factor * abs(th_difference)
+
+    def score_attacks(
+        self,
+        attacked: np.ndarray,
+        missed_attack: np.ndarray,
+        attacker_th: np.ndarray,
+        defender_th: np.ndarray,
+        attacker_number: np.ndarray,
+        defender_number: np.ndarray,
+        stars: np.ndarray,
+        destruction: np.ndarray,
+        missed_attack_penalty: float = 100.0,
+    ) -> np.ndarray:
+        th_difference = attacker_th.astype(np.int64) - defender_th.astype(np.int64)
+        number_difference = attacker_number.astype(np.int64) - defender_number.astype(np.int64)
+        index = np.clip(th_difference, -self.max_th_difference, self.max_th_difference) + self.max_th_difference
+        # attacks that did not happen have no valid stars or positions, any cell will do before they are masked
+        cells = self.table[index, np.clip(stars.astype(np.int64), 0, 3), np.where(number_difference >= 0, 0, 1)]
+        scores = (
+            destruction * cells[:, 0]
+            + cells[:, 1]
+            + cells[:, 2] * number_difference
+            + cells[:, 3] * np.abs(th_difference)
+        )
+        scores = np.where(attacked, scores, 0.0)
+        return np.where(missed_attack, -abs(missed_attack_penalty), scores)
+
+    def __compile(self) -> np.ndarray:
+        size = 2 * self.max_th_difference + 1
+        table = np.zeros((size, len(STARS), len(POSITIONS), len(COEFFICIENTS)))
+        for index in range(size):
+            th_difference = index - self.max_th_difference
+            for stars in STARS:
+                for name, position in POSITIONS.items():
+                    rule = next((rule for rule in self.rules if rule.matches(th_difference, stars, position)), None)
+                    if rule is None:
+                        raise Exception(
+                            f"Scoring rules {self.version} do not cover th difference {th_difference}, "
+                            f"{stars} stars, position {name}"
+                        )
+
+                    table[index, stars, position] = rule.coefficients
+
+        if not self.number_difference_check:
+            table[..., COEFFICIENTS.index("position_factor")] = 0.0
+
+        return table
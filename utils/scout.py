@@ -0,0 +1,115 @@
+import logging
+import os
+import pickle
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from statistics import mean
+from typing import Optional
+
+from utils.coc_api_service import CocApiService
+from utils.league import League
+
+logger = logging.getLogger("analyzer")
+
+# number of most recent regular wars used for form stats
+RECENT_WAR_COUNT = 10
+
+
+@dataclass
+class OpponentReport:
+    tag: str
+    name: str
+    town_halls: Counter = field(default_factory=Counter)
+    average_th: float = 0.0
+    clan_level: Optional[int] = None
+    war_league: Optional[str] = None
+    war_log_public: bool = False
+    recent_wars: int = 0
+    recent_win_rate: Optional[float] = None
+    recent_attack_usage: Optional[float] = None
+    recent_stars_per_attack: Optional[float] = None
+    recent_destruction: Optional[float] = None
+
+
+class LeagueScout:
+    def __init__(self, api: Optional[CocApiService] = None, max_workers: int = 8, *, recheck: bool = False):
+        self.api = api or CocApiService()
+        self.max_workers = max_workers
+        self.recheck = recheck
+        self.reports: dict[str, OpponentReport] = {}
+        self.season: Optional[str] = None
+
+    def scout(self, league_info: dict, month: str, clan_alias: str) -> dict[str, OpponentReport]:
+        scouting_pickle_path = f"results/{month}/{clan_alias}_scouting.p"
+        if os.path.exists(scouting_pickle_path) and not self.recheck:
+            season, reports = pickle.load(open(scouting_pickle_path, "rb"))
+            if season == league_info.get("season"):
+                self.season, self.reports = season, reports
+                return self.reports
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            reports = list(executor.map(self.__scout_clan, league_info["clans"]))
+
+        self.season = league_info.get("season")
+        self.reports = {report.tag: report for report in reports}
+        pickle.dump((self.season, self.reports), open(scouting_pickle_path, "wb"))
+        return self.reports
+
+    def get(self, clan_tag: str) -> Optional[OpponentReport]:
+        return self.reports.get(clan_tag)
+
+    def get_round_opponents(self, league: League) -> list[Optional[OpponentReport]]:
+        # wars are stored in round order, ours is the one where we are the home clan
+        return [
+            self.reports.get(war.enemy_clan_info["tag"])
+            for war in league.wars
+            if war.home_clan_info["tag"] == league.clan_tag
+        ]
+
+    def __scout_clan(self, clan: dict) -> OpponentReport:
+        town_halls = Counter(member["townHallLevel"] for member in clan["members"])
+        report = OpponentReport(
+            clan["tag"],
+            clan["name"],
+            town_halls=town_halls,
+            average_th=mean(town_halls.elements()) if town_halls else 0.0,
+            clan_level=clan.get("clanLevel"),
+        )
+
+        try:
+            clan_info = self.api.get_clan_info(clan["tag"])
+        except Exception as e:
+            logger.warning(f"Could not scout clan {clan['tag']}: {e}")
+            return report
+
+        report.war_league = clan_info.get("warLeague", {}).get("name")
+        report.war_log_public = clan_info.get("isWarLogPublic", False)
+        if not report.war_log_public:
+            return report
+
+        try:
+            war_log = self.api.get_war_log(clan["tag"])
+        except Exception as e:
+            logger.warning(f"Could not fetch war log for clan {clan['tag']}: {e}")
+            return report
+
+        self.__add_recent_form(report, war_log["items"])
+        return report
+
+    @staticmethod
+    def __add_recent_form(report: OpponentReport, war_log_items: list[dict]) -> None:
+        # cwl seasons show up in the war log without a result, skip them
+        wars = [war for war in war_log_items if war.get("result")][:RECENT_WAR_COUNT]
+        if not wars:
+            return
+
+        attacks = sum(war["clan"].get("attacks", 0) for war in wars)
+        available_attacks = sum(war["teamSize"] * war["attacksPerMember"] for war in wars)
+        stars = sum(war["clan"]["stars"] for war in wars)
+
+        report.recent_wars = len(wars)
+        report.recent_win_rate = sum(1 for war in wars if war["result"] == "win") / len(wars)
+        report.recent_attack_usage = attacks / available_attacks if available_attacks else None
+        report.recent_stars_per_attack = stars / attacks if attacks else None
+        report.recent_destruction = mean(war["clan"]["destructionPercentage"] for war in wars)
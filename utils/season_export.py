@@ -0,0 +1,74 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+from utils.cwl_analyzer import AttackRecord, CwlAnalysisResult
+from utils.scoring_rules import ScoringRules
+
+# (column, dtype) for every attack record field, strings are stored as fixed width unicode
+ATTACK_COLUMNS = [
+    ("round_index", np.int16),
+    ("player_tag", str),
+    ("player_name", str),
+    ("attacked", np.bool_),
+    ("missed_attack", np.bool_),
+    ("attacker_th", np.int8),
+    ("defender_th", np.int8),
+    ("attacker_number", np.int16),
+    ("defender_number", np.int16),
+    ("stars", np.int8),
+    ("destruction", np.float32),
+    ("score", np.float32),
+]
+
+
+def export_season(
+    results: Iterable[CwlAnalysisResult],
+    path: str,
+    compressed: bool = False,
+    extra_columns: Optional[dict[str, np.ndarray]] = None,
+) -> None:
+    results = list(results)
+    attacks: list[AttackRecord] = [attack for result in results for attack in result.attacks]
+
+    columns = {
+        name: np.array([getattr(attack, name) for attack in attacks], dtype=dtype) for name, dtype in ATTACK_COLUMNS
+    }
+    columns["clan_tag"] = np.array([result.clan_tag for result in results for _ in result.attacks], dtype=str)
+
+    columns["clans.tag"] = np.array([result.clan_tag for result in results], dtype=str)
+    columns["clans.alias"] = np.array([result.clan_alias for result in results], dtype=str)
+    columns["clans.name"] = np.array([result.clan_name for result in results], dtype=str)
+    columns["clans.month"] = np.array([result.month for result in results], dtype=str)
+    columns["clans.friendly_th_average"] = np.array([result.friendly_th_average for result in results], np.float32)
+    columns["clans.enemy_th_average"] = np.array([result.enemy_th_average for result in results], np.float32)
+    columns["clans.scoring_version"] = np.array([result.scoring_version or "" for result in results], dtype=str)
+
+    columns.update(extra_columns or {})
+
+    save = np.savez_compressed if compressed else np.savez
+    save(path, **columns)
+
+
+def load_season(path: str) -> dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def rescore_season(season: dict[str, np.ndarray], rules: ScoringRules, missed_attack_penalty: float = 100.0) -> dict:
+    scores = rules.score_attacks(
+        season["attacked"],
+        season["missed_attack"],
+        season["attacker_th"],
+        season["defender_th"],
+        season["attacker_number"],
+        season["defender_number"],
+        season["stars"],
+        season["destruction"],
+        missed_attack_penalty,
+    )
+    return {
+        **season,
+        "score": scores.astype(np.float32),
+        "clans.scoring_version": np.full(len(season["clans.tag"]), rules.version),
+    }
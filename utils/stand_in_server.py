@@ -0,0 +1,387 @@
+import argparse
+import base64
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from utils.league_registry import LEAGUES_PATH, WAR_LEAGUES_PATH
+from utils.token_pool import TokenBucket
+
+logger = logging.getLogger("analyzer")
+
+TAG_CHARACTERS = "0289PYLQGRJCUV"
+GROUP_SIZE = 8
+BADGE_URL = "https://api-assets.clashofclans.com/badges/{size}/stand-in.png"
+
+
+@dataclass
+class FaultConfig:
+    min_latency: float = 0.0  # seconds
+    max_latency: float = 0.0
+    rate_limit: Optional[float] = None  # requests per second per token
+    error_rate: float = 0.0  # share of requests answered with a 5xx
+    tokens: Optional[list[str]] = None  # accepted tokens, any token when not set
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    denied: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def to_dict(self) -> dict:
+        return {"requests": self.requests, "throttled": self.throttled, "errors": self.errors, "denied": self.denied}
+
+
+class SyntheticWorld:
+    def __init__(self, clan_count: int = 8, team_size: int = 15, war_log_size: int = 50, seed: int = 0) -> None:
+        self.random = random.Random(seed)
+        self.team_size = team_size
+        self.war_log_size = war_log_size
+        self.clans: dict[str, dict] = {}
+        self.groups: dict[str, dict] = {}
+        self.wars: dict[str, dict] = {}
+        self.current_wars: dict[str, dict] = {}
+        self.war_logs: dict[str, list[dict]] = {}
+
+        with open(WAR_LEAGUES_PATH, "r") as f:
+            self.war_leagues = json.loads(f.read())
+        with open(LEAGUES_PATH, "r") as f:
+            self.leagues = json.loads(f.read())
+
+        for group_start in range(0, clan_count, GROUP_SIZE):
+            self.__make_group(min(GROUP_SIZE, clan_count - group_start))
+
+    def __make_tag(self, length: int = 9) -> str:
+        return "#" + "".join(self.random.choice(TAG_CHARACTERS) for _ in range(length))
+
+    def __make_clan(self, war_league: dict) -> dict:
+        tag = self.__make_tag(8)
+        base_th = self.random.randint(10, 15)
+        members = [
+            {
+                "tag": self.__make_tag(),
+                "name": f"Player {i + 1}",
+                "townHallLevel": max(1, min(16, base_th + self.random.randint(-2, 1))),
+            }
+            for i in range(self.team_size + self.random.randint(0, 5))
+        ]
+        clan = {
+            "tag": tag,
+            "name": f"Clan {len(self.clans) + 1}",
+            "clanLevel": self.random.randint(5, 25),
+            "badgeUrls": {
+                size: BADGE_URL.format(size=px) for size, px in (("small", 70), ("medium", 200), ("large", 512))
+            },
+            "isWarLogPublic": self.random.random() < 0.8,
+            "warLeague": {"id": war_league["id"], "name": war_league["name"]},
+            "members": len(members),
+            "memberList": members,
+        }
+        self.clans[tag] = clan
+        self.war_logs[tag] = [self.__make_war_log_entry() for _ in range(self.war_log_size)]
+        return clan
+
+    def __make_group(self, size: int) -> None:
+        war_league = self.random.choice(self.war_leagues["items"][1:])
+        clans = [self.__make_clan(war_league) for _ in range(size)]
+        rounds = []
+        # circle method round robin, one clan sits out each round when the group is odd
+        order = clans + ([None] if len(clans) % 2 else [])
+        for _ in range(len(order) - 1):
+            war_tags = []
+            for i in range(len(order) // 2):
+                home, away = order[i], order[-i - 1]
+                if home and away:
+                    war_tags.append(self.__make_cwl_war(home, away))
+            rounds.append({"warTags": war_tags})
+            order = [order[0], order[-1], *order[1:-1]]
+
+        group = {
+            "state": "ended",
+            "season": time.strftime("%Y-%m"),
+            "clans": [
+                {
+                    "tag": clan["tag"],
+                    "name": clan["name"],
+                    "clanLevel": clan["clanLevel"],
+                    "badgeUrls": clan["badgeUrls"],
+                    "members": clan["memberList"],
+                }
+                for clan in clans
+            ],
+            "rounds": rounds,
+        }
+        for clan in clans:
+            self.groups[clan["tag"]] = group
+            # the last regular war of each clan, fought against another clan of the group
+            opponent = self.random.choice([other for other in clans if other is not clan] or [clan])
+            self.current_wars[clan["tag"]] = self.__make_war(clan, opponent, attacks_per_member=2)
+
+    def __make_war(self, home: dict, away: dict, attacks_per_member: int = 1) -> dict:
+        home_lineup = self.__make_lineup(home)
+        away_lineup = self.__make_lineup(away)
+        self.__make_attacks(home_lineup, away_lineup, attacks_per_member)
+        self.__make_attacks(away_lineup, home_lineup, attacks_per_member)
+        return {
+            "state": "warEnded",
+            "teamSize": self.team_size,
+            "attacksPerMember": attacks_per_member,
+            "endTime": time.strftime("%Y%m%dT%H%M%S.000Z"),
+            "clan": self.__make_war_clan(home, home_lineup, away_lineup),
+            "opponent": self.__make_war_clan(away, away_lineup, home_lineup),
+        }
+
+    def __make_cwl_war(self, home: dict, away: dict) -> str:
+        war_tag = self.__make_tag()
+        self.wars[war_tag] = self.__make_war(home, away)
+        return war_tag
+
+    def __make_lineup(self, clan: dict) -> list[dict]:
+        members = sorted(
+            self.random.sample(clan["memberList"], self.team_size), key=lambda m: m["townHallLevel"], reverse=True
+        )
+        return [
+            {
+                "tag": member["tag"],
+                "name": member["name"],
+                "townhallLevel": member["townHallLevel"],
+                "mapPosition": position + 1,
+            }
+            for position, member in enumerate(members)
+        ]
+
+    def __make_attacks(self, attackers: list[dict], defenders: list[dict], attacks_per_member: int) -> None:
+        for attacker in attackers:
+            for _ in range(attacks_per_member):
+                if self.random.random() < 0.05:
+                    continue
+
+                position = max(0, min(len(defenders) - 1, attacker["mapPosition"] - 1 + self.random.randint(-2, 2)))
+                defender = defenders[position]
+                th_difference = attacker["townhallLevel"] - defender["townhallLevel"]
+                stars = max(0, min(3, self.random.choices([0, 1, 2, 3], weights=[5, 15, 35, 45])[0] + th_difference))
+                destruction = 100 if stars == 3 else self.random.randint(max(0, 50 * stars - 20), 99 if stars else 49)
+                attacker.setdefault("attacks", []).append(
+                    {
+                        "attackerTag": attacker["tag"],
+                        "defenderTag": defender["tag"],
+                        "stars": stars,
+                        "destructionPercentage": destruction,
+                        "order": 1,
+                        "duration": self.random.randint(60, 180),
+                    }
+                )
+
+    def __make_war_clan(self, clan: dict, lineup: list[dict], enemy_lineup: list[dict]) -> dict:
+        best = {}
+        for member in lineup:
+            for attack in member.get("attacks", []):
+                best[attack["defenderTag"]] = max(
+                    best.get(attack["defenderTag"], (0, 0)), (attack["stars"], attack["destructionPercentage"])
+                )
+
+        return {
+            "tag": clan["tag"],
+            "name": clan["name"],
+            "badgeUrls": clan["badgeUrls"],
+            "clanLevel": clan["clanLevel"],
+            "attacks": sum(1 for member in lineup if member.get("attacks")),
+            "stars": sum(stars for stars, _ in best.values()),
+            "destructionPercentage": sum(destruction for _, destruction in best.values()) / len(enemy_lineup),
+            "members": lineup,
+        }
+
+    def __make_war_log_entry(self) -> dict:
+        team_size = self.random.choice([15, 20, 30])
+        stars = self.random.randint(team_size, team_size * 3)
+        opponent_stars = self.random.randint(team_size, team_size * 3)
+        return {
+            "result": "win" if stars > opponent_stars else "lose" if stars < opponent_stars else "tie",
+            "endTime": time.strftime("%Y%m%dT%H%M%S.000Z"),
+            "teamSize": team_size,
+            "attacksPerMember": 2,
+            "clan": {
+                "attacks": self.random.randint(team_size, team_size * 2),
+                "stars": stars,
+                "destructionPercentage": round(self.random.uniform(50, 100), 2),
+            },
+            "opponent": {"tag": self.__make_tag(8), "stars": opponent_stars},
+        }
+
+
+class StandInServer:
+    def __init__(self, world: SyntheticWorld, faults: Optional[FaultConfig] = None) -> None:
+        self.world = world
+        self.faults = faults or FaultConfig()
+        self.stats = ServerStats()
+        self.__buckets: dict[str, TokenBucket] = {}
+        self.__random = random.Random()
+        self.__lock = threading.Lock()
+        self.routes = [
+            (re.compile(r"^/clans/(#[^/]+)/currentwar/leaguegroup$"), self.__get_league_group),
+            (re.compile(r"^/clans/(#[^/]+)/warlog$"), self.__get_war_log),
+            (re.compile(r"^/clans/(#[^/]+)/currentwar$"), self.__get_current_war),
+            (re.compile(r"^/clans/(#[^/]+)$"), self.__get_clan),
+            (re.compile(r"^/clanwarleagues/wars/(#[^/]+)$"), self.__get_war),
+            (re.compile(r"^/leagues$"), lambda query: (200, self.world.leagues)),
+            (re.compile(r"^/warleagues$"), lambda query: (200, self.world.war_leagues)),
+        ]
+
+    def handle(self, path: str, token: Optional[str]) -> tuple[int, dict]:
+        if path == "/_stats":
+            return 200, self.stats.to_dict()
+
+        self.stats.add("requests")
+        if self.faults.max_latency:
+            time.sleep(self.__random.uniform(self.faults.min_latency, self.faults.max_latency))
+
+        if token is None or (self.faults.tokens is not None and token not in self.faults.tokens):
+            self.stats.add("denied")
+            return 403, {"reason": "accessDenied", "message": "Invalid authorization"}
+
+        if self.faults.rate_limit and not self.__take_token(token):
+            self.stats.add("throttled")
+            return 429, {"reason": "requestThrottled", "message": "Request was throttled"}
+
+        if self.__random.random() < self.faults.error_rate:
+            self.stats.add("errors")
+            return self.__random.choice([500, 503]), {"reason": "inMaintenance", "message": "Injected failure"}
+
+        parsed = urlparse(path)
+        route = unquote(re.sub(r"^/v\d+", "", parsed.path))
+        for pattern, handler in self.routes:
+            match = pattern.match(route)
+            if match:
+                return handler(parse_qs(parsed.query), *match.groups())
+
+        return 404, {"reason": "notFound"}
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                authorization = self.headers.get("Authorization", "")
+                token = authorization[len("Bearer ") :] if authorization.startswith("Bearer ") else None
+                status, body = stand_in.handle(self.path, token)
+                encoded = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def __take_token(self, token: str) -> bool:
+        with self.__lock:
+            bucket = self.__buckets.setdefault(token, TokenBucket(self.faults.rate_limit))
+            bucket.refill(time.monotonic())
+            if bucket.tokens < 1:
+                return False
+
+            bucket.tokens -= 1
+            return True
+
+    def __get_league_group(self, query: dict, clan_tag: str) -> tuple[int, dict]:
+        if clan_tag not in self.world.groups:
+            return 404, {"reason": "notFound"}
+        return 200, self.world.groups[clan_tag]
+
+    def __get_clan(self, query: dict, clan_tag: str) -> tuple[int, dict]:
+        if clan_tag not in self.world.clans:
+            return 404, {"reason": "notFound"}
+        return 200, self.world.clans[clan_tag]
+
+    def __get_war(self, query: dict, war_tag: str) -> tuple[int, dict]:
+        if war_tag not in self.world.wars:
+            return 404, {"reason": "notFound"}
+        return 200, self.world.wars[war_tag]
+
+    def __get_current_war(self, query: dict, clan_tag: str) -> tuple[int, dict]:
+        if clan_tag not in self.world.clans:
+            return 404, {"reason": "notFound"}
+        if not self.world.clans[clan_tag]["isWarLogPublic"]:
+            return 403, {"reason": "accessDenied", "message": "Access denied, clan war log is private."}
+        return 200, self.world.current_wars[clan_tag]
+
+    def __get_war_log(self, query: dict, clan_tag: str) -> tuple[int, dict]:
+        if clan_tag not in self.world.clans:
+            return 404, {"reason": "notFound"}
+        if not self.world.clans[clan_tag]["isWarLogPublic"]:
+            return 403, {"reason": "accessDenied", "message": "Access denied, clan war log is private."}
+
+        items = self.world.war_logs[clan_tag]
+        start = self.__decode_cursor(query.get("after", [None])[0])
+        limit = int(query.get("limit", [len(items)])[0])
+        end = min(len(items), start + limit)
+
+        cursors = {}
+        if start > 0:
+            cursors["before"] = self.__encode_cursor(start)
+        if end < len(items):
+            cursors["after"] = self.__encode_cursor(end)
+        return 200, {"items": items[start:end], "paging": {"cursors": cursors}}
+
+    @staticmethod
+    def __encode_cursor(position: int) -> str:
+        return base64.b64encode(json.dumps({"pos": position}).encode()).decode()
+
+    @staticmethod
+    def __decode_cursor(cursor: Optional[str]) -> int:
+        if not cursor:
+            return 0
+        return json.loads(base64.b64decode(cursor))["pos"]
+
+
+def __main__():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the coc api serving synthetic data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clans", type=int, default=8, help="number of clans, grouped in leagues of 8")
+    parser.add_argument("--team-size", type=int, default=15)
+    parser.add_argument("--war-log-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--max-latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second per token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with a 5xx")
+    parser.add_argument("--tokens", default=None, help="comma separated accepted tokens, any token when not set")
+    args = parser.parse_args()
+
+    world = SyntheticWorld(args.clans, args.team_size, args.war_log_size, args.seed)
+    faults = FaultConfig(
+        args.min_latency,
+        max(args.min_latency, args.max_latency),
+        args.rate_limit,
+        args.error_rate,
+        args.tokens.split(",") if args.tokens else None,
+    )
+    server = StandInServer(world, faults).serve(args.host, args.port)
+    logger.info(f"Serving {len(world.clans)} clans on http://{args.host}:{args.port}/v1/")
+    for tag, clan in list(world.clans.items())[:GROUP_SIZE]:
+        logger.info(f"{tag} {clan['name']}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class ApiKey:
+    def __init__(self, token: str, rate: float, burst: Optional[float] = None) -> None:
+        self.token = token
+        self.bucket = TokenBucket(rate, burst)
+        self.in_flight = 0
+        self.quarantined_until = 0.0
+        self.requests = 0
+
+
+class TokenPool:
+    def __init__(
+        self,
+        tokens: list[str],
+        rate: float = 10.0,
+        burst: Optional[float] = None,
+        quarantine_seconds: float = 30.0,
+        rate_window: float = 10.0,
+    ) -> None:
+        self.keys = [ApiKey(token, rate, burst) for token in tokens]
+        self.quarantine_seconds = quarantine_seconds
+        self.rate_window = rate_window
+        self.__lock = threading.Lock()
+        self.__sent: deque[float] = deque()
+
+    def acquire(self) -> ApiKey:
+        if not self.keys:
+            raise Exception("No coc api tokens configured")
+
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                available = [key for key in self.keys if key.quarantined_until <= now]
+                for key in available:
+                    key.bucket.refill(now)
+
+                ready = [key for key in available if key.bucket.tokens >= 1]
+                if ready:
+                    key = min(ready, key=lambda key: (key.in_flight, -key.bucket.tokens))
+                    key.bucket.tokens -= 1
+                    key.in_flight += 1
+                    key.requests += 1
+                    self.__record(now)
+                    return key
+
+                if available:
+                    wait = min(key.bucket.wait_time() for key in available)
+                else:
+                    wait = min(key.quarantined_until for key in self.keys) - now
+
+            time.sleep(max(wait, 0.001))
+
+    def release(self, key: ApiKey) -> None:
+        with self.__lock:
+            key.in_flight -= 1
+
+    def quarantine(self, key: ApiKey) -> None:
+        with self.__lock:
+            key.quarantined_until = time.monotonic() + self.quarantine_seconds
+
+    @property
+    def request_rate(self) -> float:
+        with self.__lock:
+            self.__expire(time.monotonic())
+            return len(self.__sent) / self.rate_window
+
+    def __record(self, now: float) -> None:
+        self.__sent.append(now)
+        self.__expire(now)
+
+    def __expire(self, now: float) -> None:
+        while self.__sent and self.__sent[0] < now - self.rate_window:
+            self.__sent.popleft()
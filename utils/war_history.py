@@ -0,0 +1,233 @@
+import logging
+import os
+import pickle
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from statistics import mean
+from typing import Optional
+
+import numpy as np
+
+from utils.coc_api_service import CocApiService
+from utils.cwl_analyzer import AttackRecord, CwlAnalysisResult, CwlAnalyzer, LeaguePerformance
+from utils.player import Player
+from utils.season_export import export_season
+
+logger = logging.getLogger("analyzer")
+
+WAR_HISTORY_PATH = "results/war_history"
+
+# (column, dtype) for every war log record field, exported as wars.* next to the attack columns
+WAR_LOG_COLUMNS = [
+    ("end_time", str),
+    ("result", str),
+    ("team_size", np.int16),
+    ("attacks_per_member", np.int8),
+    ("attacks", np.int16),
+    ("stars", np.int16),
+    ("destruction", np.float32),
+    ("opponent_tag", str),
+    ("opponent_stars", np.int16),
+]
+
+
+@dataclass
+class WarLogRecord:
+    end_time: str
+    result: Optional[str]
+    team_size: int
+    attacks_per_member: int
+    attacks: int
+    stars: int
+    destruction: float
+    opponent_tag: Optional[str]
+    opponent_stars: int
+
+
+@dataclass
+class WarHistory:
+    clan_tag: str
+    wars: list[WarLogRecord] = field(default_factory=list)
+    # attack level data, only available for wars ingested through the current war endpoint
+    attacks: list[AttackRecord] = field(default_factory=list)
+    th_averages: list[tuple[float, float]] = field(default_factory=list)
+    attack_war_end_times: list[str] = field(default_factory=list)
+    scoring_version: Optional[str] = None
+    # cursor of the next page while a backfill is in progress
+    cursor: Optional[str] = None
+    backfilled: bool = False
+
+    def known_wars(self) -> set[tuple]:
+        return {(war.end_time, war.opponent_tag) for war in self.wars}
+
+    def to_result(self, clan_alias: str, clan_name: str, month: str) -> CwlAnalysisResult:
+        player_scores: dict[Player, LeaguePerformance] = defaultdict(lambda: LeaguePerformance(scores=[]))
+        players = {}
+        # regular wars can have several attacks per member, participation is counted once per war
+        participated, attacked = set(), set()
+        for attack in self.attacks:
+            player = players.setdefault(
+                attack.player_tag, Player(attack.player_name, attack.player_tag, attack.attacker_th)
+            )
+            player_scores[player].score += attack.score
+            player_scores[player].scores.append(attack.score)
+            participated.add((attack.player_tag, attack.round_index))
+            if attack.attacked:
+                attacked.add((attack.player_tag, attack.round_index))
+
+        participated_counts = Counter(tag for tag, _ in participated)
+        attacked_counts = Counter(tag for tag, _ in attacked)
+        for player, performance in player_scores.items():
+            performance.wars_participated = participated_counts[player.tag]
+            performance.wars_attacked = attacked_counts[player.tag]
+
+        return CwlAnalysisResult(
+            self.clan_tag,
+            clan_alias,
+            clan_name,
+            month,
+            sorted(player_scores.items(), key=lambda x: x[1].score, reverse=True),
+            self.attacks,
+            mean(friendly for friendly, _ in self.th_averages) if self.th_averages else 0.0,
+            mean(enemy for _, enemy in self.th_averages) if self.th_averages else 0.0,
+            self.scoring_version,
+        )
+
+
+class WarHistoryIngestor:
+    def __init__(
+        self,
+        api: Optional[CocApiService] = None,
+        analyzer: Optional[CwlAnalyzer] = None,
+        max_workers: int = 8,
+        page_size: int = 50,
+    ) -> None:
+        self.api = api or CocApiService()
+        self.analyzer = analyzer or CwlAnalyzer(api=self.api)
+        self.max_workers = max_workers
+        self.page_size = page_size
+
+    def ingest(self, clan_tags: list[str]) -> dict[str, WarHistory]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            histories = list(executor.map(self.ingest_clan, clan_tags))
+
+        return {history.clan_tag: history for history in histories}
+
+    def ingest_clan(self, clan_tag: str) -> WarHistory:
+        os.makedirs(WAR_HISTORY_PATH, exist_ok=True)
+        history = self.load(clan_tag)
+        try:
+            self.__ingest_war_log(history)
+            self.__ingest_current_war(history)
+        except Exception as e:
+            logger.warning(f"Could not ingest war history for {clan_tag}, progress is kept: {e}")
+
+        return history
+
+    @staticmethod
+    def load(clan_tag: str) -> WarHistory:
+        path = WarHistoryIngestor.__get_path(clan_tag)
+        if os.path.exists(path):
+            return pickle.load(open(path, "rb"))
+
+        return WarHistory(clan_tag)
+
+    def __ingest_war_log(self, history: WarHistory) -> None:
+        known = history.known_wars()
+        # a finished backfill only needs the newest pages, an interrupted one resumes at its cursor
+        cursor = history.cursor if not history.backfilled else None
+        while True:
+            page = self.api.get_war_log(history.clan_tag, limit=self.page_size, after=cursor)
+            # cwl seasons have no result and are skipped, they do not count as known wars
+            wars = [war for war in map(self.__make_war_log_record, page["items"]) if war.end_time]
+            hit_known = any((war.end_time, war.opponent_tag) in known for war in wars)
+            new_wars = [war for war in wars if (war.end_time, war.opponent_tag) not in known]
+            known.update((war.end_time, war.opponent_tag) for war in new_wars)
+            history.wars.extend(new_wars)
+
+            cursor = page.get("paging", {}).get("cursors", {}).get("after")
+            reached_known = history.backfilled and hit_known
+            if not history.backfilled:
+                history.cursor = cursor
+                history.backfilled = cursor is None
+            self.__save(history)
+
+            if cursor is None or reached_known:
+                break
+
+        history.wars.sort(key=lambda war: war.end_time, reverse=True)
+        self.__save(history)
+
+    def __ingest_current_war(self, history: WarHistory) -> None:
+        war_info = self.api.get_current_war(history.clan_tag)
+        if war_info.get("state") != "warEnded" or war_info["endTime"] in history.attack_war_end_times:
+            return
+
+        if war_info["clan"]["tag"] == history.clan_tag:
+            home_clan_info, enemy_clan_info = war_info["clan"], war_info["opponent"]
+        else:
+            home_clan_info, enemy_clan_info = war_info["opponent"], war_info["clan"]
+
+        # every ingested war counts as one round
+        round_index = len(history.attack_war_end_times)
+        attacks_per_member = war_info.get("attacksPerMember", 2)
+        for member in home_clan_info["members"]:
+            attacks = member.get("attacks", [])
+            # one record per attack, unused attacks are recorded as missed
+            for attack in attacks + [None] * (attacks_per_member - len(attacks)):
+                player = Player(member["name"], member["tag"], member["townhallLevel"])
+                player.add_war_participation({**member, "attacks": [attack] if attack else []}, enemy_clan_info, True)
+                history.attacks.append(
+                    AttackRecord.from_player(round_index, player, self.analyzer.score_player(player))
+                )
+
+        history.th_averages.append(
+            (
+                mean(member["townhallLevel"] for member in home_clan_info["members"]),
+                mean(member["townhallLevel"] for member in enemy_clan_info["members"]),
+            )
+        )
+        history.attack_war_end_times.append(war_info["endTime"])
+        history.scoring_version = self.analyzer.scoring_rules.version
+        self.__save(history)
+
+    def __save(self, history: WarHistory) -> None:
+        path = self.__get_path(history.clan_tag)
+        with open(f"{path}.tmp", "wb") as f:
+            pickle.dump(history, f)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def __make_war_log_record(war: dict) -> WarLogRecord:
+        return WarLogRecord(
+            war.get("endTime", "") if war.get("result") else "",
+            war.get("result"),
+            war["teamSize"],
+            war["attacksPerMember"],
+            war["clan"].get("attacks", 0),
+            war["clan"]["stars"],
+            war["clan"]["destructionPercentage"],
+            war["opponent"].get("tag"),
+            war["opponent"].get("stars", 0),
+        )
+
+    @staticmethod
+    def __get_path(clan_tag: str) -> str:
+        return f"{WAR_HISTORY_PATH}/{clan_tag.lstrip('#')}.p"
+
+
+def export_war_history(
+    histories: dict[str, WarHistory], clans: list[tuple[str, str, str]], month: str, path: str
+) -> None:
+    # clans are (alias, tag, name)
+    results = [histories[tag].to_result(alias, name, month) for alias, tag, name in clans]
+    wars = [(tag, war) for _, tag, _ in clans for war in histories[tag].wars]
+
+    columns = {}
+    for name, dtype in WAR_LOG_COLUMNS:
+        # missing results and opponent tags are stored as empty strings
+        values = [getattr(war, name) for _, war in wars]
+        columns[f"wars.{name}"] = np.array(["" if value is None else value for value in values], dtype=dtype)
+    columns["wars.clan_tag"] = np.array([tag for tag, _ in wars], dtype=str)
+    export_season(results, path, extra_columns=columns)